@@ -1,7 +1,13 @@
 from __future__ import absolute_import, unicode_literals
 
-# This will make sure the app is always imported when
-# Django starts so that shared_task will use this app.
-from .celery import app as celery_app
+# The Celery app is loaded on first use rather than at import time, so
+# manage.py commands that never touch tasks don't pay for importing
+# celery and kombu. Task modules import alx_travel_app.celery themselves
+# so that shared_task binds to this app.
+def __getattr__(name):
+    if name == 'celery_app':
+        from .celery import app
+        return app
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
-__all__ = ('celery_app',)
\ No newline at end of file
+__all__ = ('celery_app',)
@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import F
+from .models import ArchivedBooking, Booking
+import logging
+
+logger = logging.getLogger(__name__)
+
+ARCHIVABLE_STATUSES = (Booking.STATUS_CANCELLED, Booking.STATUS_COMPLETED)
+
+
+def archive_bookings(cutoff, chunk_size=None):
+    """
+    Move cancelled and completed bookings that checked out before
+    ``cutoff`` from the hot table into the archive, one chunk at a time.
+    
+    Rows are copied before they are deleted and the copy ignores
+    conflicts, so an interrupted run can simply be repeated.
+    Returns the number of bookings archived.
+    """
+    chunk_size = chunk_size or settings.BOOKING_ARCHIVE_CHUNK_SIZE
+    archive_db = router.db_for_write(ArchivedBooking)
+    hot_db = router.db_for_write(Booking)
+    
+    candidates = (
+        archivable_bookings(cutoff)
+        .annotate(listing_title=F('listing__title'))
+        .order_by()
+    )
+    
+    total = 0
+    while True:
+        chunk = list(candidates[:chunk_size])
+        if not chunk:
+            break
+        
+        ArchivedBooking.objects.using(archive_db).bulk_create(
+            [ArchivedBooking.from_booking(booking) for booking in chunk],
+            ignore_conflicts=True,
+        )
+        with transaction.atomic(using=hot_db):
+            Booking.objects.using(hot_db).filter(
+                pk__in=[booking.pk for booking in chunk]
+            ).delete()
+        
+        total += len(chunk)
+        logger.info('Archived %d bookings (%d so far)', len(chunk), total)
+    
+    return total
+
+
+def archivable_bookings(cutoff):
+    return Booking.objects.filter(
+        status__in=ARCHIVABLE_STATUSES,
+        check_out_date__lt=cutoff,
+    )
+
+
+def booking_history(user):
+    """
+    All of a guest's bookings, hot and archived, as one sliceable sequence
+    """
+    hot = Booking.objects.filter(guest=user).annotate(listing_title=F('listing__title'))
+    archived = ArchivedBooking.objects.filter(guest_id=user.id)
+    return BookingHistory(hot, archived)
+
+
+class BookingHistory:
+    """
+    Read-only view over a hot and an archived queryset that supports
+    count() and slicing, so it can be handed to Django's Paginator.
+    
+    Hot bookings are listed first, then archived ones; archived bookings
+    always checked out before the archival cutoff, so the combined list
+    stays newest first apart from old stays that were never archived.
+    """
+    
+    def __init__(self, hot, archived):
+        self.hot = hot
+        self.archived = archived
+        self._hot_count = None
+    
+    def _count_hot(self):
+        if self._hot_count is None:
+            self._hot_count = self.hot.count()
+        return self._hot_count
+    
+    def count(self):
+        return self._count_hot() + self.archived.count()
+    
+    def __len__(self):
+        return self.count()
+    
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            items = self[key:key + 1]
+            if not items:
+                raise IndexError('BookingHistory index out of range')
+            return items[0]
+        
+        if key.step is not None or (key.start or 0) < 0 or (key.stop is not None and key.stop < 0):
+            raise ValueError('BookingHistory only supports non-negative slices without a step')
+        
+        start = key.start or 0
+        stop = key.stop if key.stop is not None else self.count()
+        hot_count = self._count_hot()
+        
+        items = []
+        if start < hot_count:
+            items.extend(self.hot[start:min(stop, hot_count)])
+        if stop > hot_count:
+            items.extend(self.archived[max(start - hot_count, 0):stop - hot_count])
+        return items
@@ -0,0 +1,96 @@
+from datetime import timedelta
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from bookings.archive import archivable_bookings, archive_bookings
+from bookings.models import Booking
+
+class Command(BaseCommand):
+    help = 'Move old cancelled and completed bookings into the archive database'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.BOOKING_ARCHIVE_AFTER_DAYS,
+            help='Archive bookings that checked out more than this many days ago',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.BOOKING_ARCHIVE_CHUNK_SIZE,
+            help='Number of bookings moved per batch',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many bookings would be archived',
+        )
+    
+    def handle(self, *args, **options):
+        cutoff = timezone.localdate() - timedelta(days=options['days'])
+        
+        if options['dry_run']:
+            count = archivable_bookings(cutoff).count()
+            self.stdout.write(f'{count} bookings would be archived (checked out before {cutoff})')
+            return
+        
+        # Both measurements time the same guest and listing, taken from a
+        # booking that stays in the hot table
+        sample = (
+            Booking.objects.exclude(pk__in=archivable_bookings(cutoff).values('pk'))
+            .order_by()
+            .values('guest_id', 'listing_id', 'check_in_date', 'check_out_date')
+            .first()
+        )
+        
+        before = self._measure(sample)
+        archived = archive_bookings(cutoff, chunk_size=options['chunk_size'])
+        after = self._measure(sample)
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Archived {archived} bookings (checked out before {cutoff})')
+        )
+        self._report('Before', before)
+        self._report('After', after)
+    
+    def _measure(self, sample, repeat=20):
+        """
+        Hot table row count and the average time of the two queries that
+        scale with it, for the sample booking's guest and listing: a
+        guest's booking list and a listing overlap check
+        """
+        rows = Booking.objects.count()
+        if sample is None:
+            return {'rows': rows, 'guest_ms': None, 'overlap_ms': None}
+        
+        guest_bookings = Booking.objects.filter(guest_id=sample['guest_id'])
+        overlapping = Booking.objects.filter(
+            listing_id=sample['listing_id'],
+            status__in=[Booking.STATUS_PENDING, Booking.STATUS_CONFIRMED],
+            check_in_date__lt=sample['check_out_date'],
+            check_out_date__gt=sample['check_in_date'],
+        )
+        
+        start = time.perf_counter()
+        for _ in range(repeat):
+            list(guest_bookings.all())
+        guest_ms = (time.perf_counter() - start) * 1000 / repeat
+        
+        start = time.perf_counter()
+        for _ in range(repeat):
+            overlapping.exists()
+        overlap_ms = (time.perf_counter() - start) * 1000 / repeat
+        
+        return {'rows': rows, 'guest_ms': guest_ms, 'overlap_ms': overlap_ms}
+    
+    def _report(self, label, stats):
+        if stats['guest_ms'] is None:
+            self.stdout.write(f'{label}: {stats["rows"]} hot bookings')
+            return
+        self.stdout.write(
+            f'{label}: {stats["rows"]} hot bookings, '
+            f'guest list {stats["guest_ms"]:.2f} ms, '
+            f'overlap check {stats["overlap_ms"]:.2f} ms'
+        )
@@ -2,16 +2,51 @@ from django.db import models
 from django.contrib.auth.models import User
 from listings.models import Listing
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 import uuid
 
+class BookingQuerySet(models.QuerySet):
+    def for_host(self, host):
+        """
+        Bookings on listings owned by ``host``
+        """
+        return self.filter(listing__host=host)
+    
+    def transition(self, new_status):
+        """
+        Move every booking in this queryset that may legally reach
+        ``new_status`` with a single conditional UPDATE.
+        Returns the number of bookings that changed.
+        """
+        allowed_from = self.model.TRANSITIONS.get(new_status)
+        if allowed_from is None:
+            raise ValueError(f'Unknown booking status transition: {new_status}')
+        # update() bypasses auto_now, so updated_at is set explicitly
+        return self.filter(status__in=allowed_from).update(
+            status=new_status,
+            updated_at=timezone.now(),
+        )
+
 class Booking(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_CONFIRMED = 'confirmed'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_COMPLETED = 'completed'
+    
     STATUS_CHOICES = [
-        ('pending', 'Pending'),
-        ('confirmed', 'Confirmed'),
-        ('cancelled', 'Cancelled'),
-        ('completed', 'Completed'),
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_CONFIRMED, 'Confirmed'),
+        (STATUS_CANCELLED, 'Cancelled'),
+        (STATUS_COMPLETED, 'Completed'),
     ]
     
+    # Target status -> statuses it can be reached from
+    TRANSITIONS = {
+        STATUS_CONFIRMED: (STATUS_PENDING,),
+        STATUS_CANCELLED: (STATUS_PENDING, STATUS_CONFIRMED),
+        STATUS_COMPLETED: (STATUS_CONFIRMED,),
+    }
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='bookings')
     guest = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings')
@@ -19,13 +54,18 @@ class Booking(models.Model):
     check_out_date = models.DateField()
     guests_count = models.PositiveIntegerField(validators=[MinValueValidator(1)])
     total_price = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)])
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
     special_requests = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = BookingQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'check_out_date']),
+        ]
     
     def __str__(self):
         return f"Booking {self.id} - {self.listing.title}"
@@ -34,4 +74,54 @@ class Booking(models.Model):
         if not self.total_price:
             nights = (self.check_out_date - self.check_in_date).days
             self.total_price = self.listing.price_per_night * nights
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+
+class ArchivedBooking(models.Model):
+    """
+    Cold copy of a cancelled or completed booking. Lives in the archive
+    database (see bookings.routers.ArchiveRouter), so relations are kept
+    as plain ids plus a snapshot of the listing title.
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+    listing_id = models.UUIDField(db_index=True)
+    listing_title = models.CharField(max_length=200)
+    guest_id = models.BigIntegerField()
+    check_in_date = models.DateField()
+    check_out_date = models.DateField()
+    guests_count = models.PositiveIntegerField()
+    total_price = models.DecimalField(max_digits=10, decimal_places=2)
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+    special_requests = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['guest_id', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"Archived booking {self.id} - {self.listing_title}"
+    
+    @classmethod
+    def from_booking(cls, booking):
+        listing_title = getattr(booking, 'listing_title', None)
+        if listing_title is None:
+            listing_title = booking.listing.title
+        return cls(
+            id=booking.id,
+            listing_id=booking.listing_id,
+            listing_title=listing_title,
+            guest_id=booking.guest_id,
+            check_in_date=booking.check_in_date,
+            check_out_date=booking.check_out_date,
+            guests_count=booking.guests_count,
+            total_price=booking.total_price,
+            status=booking.status,
+            special_requests=booking.special_requests,
+            created_at=booking.created_at,
+            updated_at=booking.updated_at,
+        )
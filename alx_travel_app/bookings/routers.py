@@ -0,0 +1,30 @@
+from django.conf import settings
+
+
+class ArchiveRouter:
+    """
+    Route ArchivedBooking to the archive database and keep every other
+    model off it. A no-op when the archive lives in the default database.
+    """
+    
+    def _is_archive_model(self, app_label, model_name):
+        return app_label == 'bookings' and model_name == 'archivedbooking'
+    
+    def db_for_read(self, model, **hints):
+        if self._is_archive_model(model._meta.app_label, model._meta.model_name):
+            return settings.BOOKING_ARCHIVE_DATABASE
+        return None
+    
+    def db_for_write(self, model, **hints):
+        return self.db_for_read(model, **hints)
+    
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        archive_db = settings.BOOKING_ARCHIVE_DATABASE
+        if archive_db == 'default':
+            return None
+        is_archive_model = self._is_archive_model(app_label, model_name)
+        if db == archive_db:
+            return is_archive_model
+        if is_archive_model:
+            return False
+        return None
@@ -0,0 +1,130 @@
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from listings.models import Listing
+from listings.tasks import complete_past_bookings
+from .models import Booking
+
+
+def make_listing(host, **fields):
+    return Listing.objects.create(
+        title=fields.pop('title', 'Flat'),
+        description='Test listing',
+        location=fields.pop('location', 'Paris'),
+        price_per_night=100,
+        property_type=fields.pop('property_type', 'apartment'),
+        max_guests=2,
+        host=host,
+        **fields
+    )
+
+
+def make_booking(listing, guest, status=Booking.STATUS_PENDING, days_ago=0):
+    check_in = timezone.localdate() - timedelta(days=days_ago)
+    return Booking.objects.create(
+        listing=listing,
+        guest=guest,
+        check_in_date=check_in,
+        check_out_date=check_in + timedelta(days=2),
+        guests_count=1,
+        status=status,
+    )
+
+
+@mock.patch('listings.signals.schedule_card_refresh')
+class BookingTransitionTests(TestCase):
+
+    def setUp(self):
+        self.host = User.objects.create(username='host')
+        self.other_host = User.objects.create(username='other-host')
+        self.guest = User.objects.create(username='guest')
+        self.listing = make_listing(self.host)
+        self.other_listing = make_listing(self.other_host)
+
+    def test_legal_transition_updates_status(self, _):
+        booking = make_booking(self.listing, self.guest)
+
+        updated = Booking.objects.filter(pk=booking.pk).transition(Booking.STATUS_CONFIRMED)
+
+        self.assertEqual(updated, 1)
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, Booking.STATUS_CONFIRMED)
+
+    def test_illegal_transition_updates_nothing(self, _):
+        cancelled = make_booking(self.listing, self.guest, Booking.STATUS_CANCELLED)
+        pending = make_booking(self.listing, self.guest)
+
+        self.assertEqual(Booking.objects.filter(pk=cancelled.pk).transition(Booking.STATUS_CONFIRMED), 0)
+        self.assertEqual(Booking.objects.filter(pk=pending.pk).transition(Booking.STATUS_COMPLETED), 0)
+
+        statuses = dict(Booking.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses, {cancelled.pk: Booking.STATUS_CANCELLED, pending.pk: Booking.STATUS_PENDING})
+
+    def test_unknown_status_is_rejected(self, _):
+        with self.assertRaises(ValueError):
+            Booking.objects.transition(Booking.STATUS_PENDING)
+
+    def test_bulk_transition_only_touches_the_hosts_bookings(self, _):
+        own = [make_booking(self.listing, self.guest) for _ in range(2)]
+        foreign = make_booking(self.other_listing, self.guest)
+        booking_ids = [booking.pk for booking in own] + [foreign.pk]
+
+        updated = Booking.objects.for_host(self.host).filter(id__in=booking_ids).transition(
+            Booking.STATUS_CANCELLED
+        )
+
+        self.assertEqual(updated, 2)
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.status, Booking.STATUS_PENDING)
+        self.assertEqual(
+            set(Booking.objects.filter(status=Booking.STATUS_CANCELLED).values_list('pk', flat=True)),
+            {booking.pk for booking in own},
+        )
+
+    def test_bulk_transition_skips_bookings_in_other_states(self, _):
+        pending = make_booking(self.listing, self.guest)
+        completed = make_booking(self.listing, self.guest, Booking.STATUS_COMPLETED)
+
+        updated = Booking.objects.for_host(self.host).filter(
+            id__in=[pending.pk, completed.pk]
+        ).transition(Booking.STATUS_CONFIRMED)
+
+        self.assertEqual(updated, 1)
+        completed.refresh_from_db()
+        self.assertEqual(completed.status, Booking.STATUS_COMPLETED)
+
+
+@override_settings(BOOKING_COMPLETION_BATCH_SIZE=2)
+@mock.patch('listings.signals.schedule_card_refresh')
+class CompletePastBookingsTests(TestCase):
+
+    def setUp(self):
+        self.host = User.objects.create(username='host')
+        self.guest = User.objects.create(username='guest')
+        self.listings = [make_listing(self.host, title=f'Flat {i}') for i in range(2)]
+
+    @mock.patch('listings.cards.schedule_card_refresh')
+    def test_completes_finished_stays_in_chunks(self, card_refresh, _):
+        finished = [
+            make_booking(self.listings[i % 2], self.guest, Booking.STATUS_CONFIRMED, days_ago=10)
+            for i in range(5)
+        ]
+        ongoing = make_booking(self.listings[0], self.guest, Booking.STATUS_CONFIRMED, days_ago=1)
+        pending = make_booking(self.listings[0], self.guest, Booking.STATUS_PENDING, days_ago=10)
+
+        self.assertEqual(complete_past_bookings(), 'Marked 5 bookings as completed')
+
+        statuses = dict(Booking.objects.values_list('pk', 'status'))
+        for booking in finished:
+            self.assertEqual(statuses[booking.pk], Booking.STATUS_COMPLETED)
+        self.assertEqual(statuses[ongoing.pk], Booking.STATUS_CONFIRMED)
+        self.assertEqual(statuses[pending.pk], Booking.STATUS_PENDING)
+        card_refresh.assert_called_once_with({listing.pk for listing in self.listings})
+
+    @mock.patch('listings.cards.schedule_card_refresh')
+    def test_nothing_to_complete(self, card_refresh, _):
+        make_booking(self.listings[0], self.guest, Booking.STATUS_CONFIRMED, days_ago=1)
+
+        self.assertEqual(complete_past_bookings(), 'Marked 0 bookings as completed')
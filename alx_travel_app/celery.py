@@ -2,10 +2,14 @@
 from __future__ import absolute_import, unicode_literals
 import os
 from celery import Celery
+from celery.signals import worker_process_shutdown
 from django.conf import settings
+from alx_travel_app.log_handlers import close_handlers
 
 # Set the default Django settings module for the 'celery' program.
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'alx_travel_app.settings')
+# Workers and beat default to the slim profile; Django processes that import
+# this module have already set DJANGO_SETTINGS_MODULE themselves.
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'alx_travel_app.settings_worker')
 
 app = Celery('alx_travel_app')
 
@@ -13,21 +17,14 @@ app = Celery('alx_travel_app')
 # the configuration object to child processes.
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
-# Load task modules from all registered Django apps.
-app.autodiscover_tasks()
-
-# Optional: Configure task routes
-app.conf.task_routes = {
-    'listings.tasks.send_booking_confirmation_email': {'queue': 'emails'},
-}
-
-# Optional: Configure task options
-app.conf.task_annotations = {
-    'listings.tasks.send_booking_confirmation_email': {
-        'rate_limit': '50/m',
-        'time_limit': 300,
-    }
-}
+# Task modules are listed in CELERY_IMPORTS rather than autodiscovered.
+
+# Task routes and annotations come from CELERY_TASK_ROUTES and
+# CELERY_TASK_ANNOTATIONS in settings.py
+
+# Prefork children exit with os._exit(), skipping logging.shutdown(), so the
+# queued log handlers are drained here before each child exits
+worker_process_shutdown.connect(close_handlers)
 
 @app.task(bind=True)
 def debug_task(self):
@@ -0,0 +1,146 @@
+"""
+Precomputed listing "cards": a versioned JSON blob per listing holding
+everything list pages show besides the listing row itself (host display
+name, booking aggregates and an availability summary).
+
+Cards are rebuilt by the rebuild_listing_cards task whenever a listing or
+one of its bookings changes, and read with a single cache.get_many() per
+page. Bump CARD_VERSION whenever the card layout changes.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+from .models import Listing
+import logging
+
+logger = logging.getLogger(__name__)
+
+CARD_VERSION = 1
+
+ACTIVE_STATUSES = ('pending', 'confirmed')
+
+
+def card_key(listing_id):
+    return f'listing-card:v{CARD_VERSION}:{listing_id}'
+
+
+def build_listing_cards(listing_ids):
+    """
+    Build cards for the given listings with one aggregate query over the
+    hot bookings table and one over the archive
+    """
+    from bookings.models import ArchivedBooking
+    
+    today = timezone.localdate()
+    listings = (
+        Listing.objects.filter(pk__in=listing_ids)
+        .select_related('host')
+        .annotate(
+            booking_count=Count('bookings', filter=~Q(bookings__status='cancelled')),
+            completed_stays=Count('bookings', filter=Q(bookings__status='completed')),
+            upcoming_bookings=Count(
+                'bookings',
+                filter=Q(bookings__status__in=ACTIVE_STATUSES, bookings__check_out_date__gte=today),
+            ),
+            next_check_in=Min(
+                'bookings__check_in_date',
+                filter=Q(bookings__status__in=ACTIVE_STATUSES, bookings__check_in_date__gte=today),
+            ),
+        )
+    )
+    
+    archived = dict(
+        ArchivedBooking.objects.filter(listing_id__in=listing_ids, status='completed')
+        .order_by()
+        .values('listing_id')
+        .annotate(count=Count('pk'))
+        .values_list('listing_id', 'count')
+    )
+    
+    built_at = timezone.now().isoformat()
+    cards = {}
+    for listing in listings:
+        archived_stays = archived.get(listing.pk, 0)
+        cards[str(listing.pk)] = {
+            'version': CARD_VERSION,
+            'id': str(listing.pk),
+            'title': listing.title,
+            'location': listing.location,
+            'property_type': listing.property_type,
+            'price_per_night': str(listing.price_per_night),
+            'max_guests': listing.max_guests,
+            'bedrooms': listing.bedrooms,
+            'bathrooms': listing.bathrooms,
+            'host': {
+                'id': listing.host_id,
+                'display_name': listing.host.get_full_name() or listing.host.username,
+            },
+            'stats': {
+                'bookings': listing.booking_count + archived_stays,
+                'completed_stays': listing.completed_stays + archived_stays,
+            },
+            'availability': {
+                'is_available': listing.is_available,
+                'upcoming_bookings': listing.upcoming_bookings,
+                'next_check_in': listing.next_check_in.isoformat() if listing.next_check_in else None,
+            },
+            'built_at': built_at,
+        }
+    return cards
+
+
+def refresh_listing_cards(listing_ids):
+    """
+    Rebuild and store cards, dropping the cards of deleted listings
+    """
+    listing_ids = [str(listing_id) for listing_id in listing_ids]
+    cards = build_listing_cards(listing_ids)
+    cache.set_many(
+        {card_key(listing_id): card for listing_id, card in cards.items()},
+        timeout=settings.LISTING_CARD_CACHE_TIMEOUT,
+    )
+    missing = [card_key(listing_id) for listing_id in listing_ids if listing_id not in cards]
+    if missing:
+        cache.delete_many(missing)
+    return cards
+
+
+def get_listing_cards(listings):
+    """
+    Return {listing id: card} for the given listings in one cache round
+    trip, building any missing cards inline
+    """
+    return get_listing_cards_by_id([listing.pk for listing in listings])
+
+
+def get_listing_cards_by_id(listing_ids):
+    keys = {card_key(listing_id): str(listing_id) for listing_id in listing_ids}
+    cached = cache.get_many(keys.keys())
+    cards = {keys[key]: card for key, card in cached.items()}
+    
+    missing = [listing_id for listing_id in keys.values() if listing_id not in cards]
+    if missing:
+        cards.update(refresh_listing_cards(missing))
+    return cards
+
+
+def schedule_card_refresh(listing_ids):
+    """
+    Rebuild cards in the background once the current transaction commits
+    """
+    from .tasks import rebuild_listing_cards
+    
+    listing_ids = sorted({str(listing_id) for listing_id in listing_ids})
+    if not listing_ids:
+        return
+    
+    def enqueue():
+        try:
+            rebuild_listing_cards.delay(listing_ids)
+        except Exception as e:
+            # Don't fail the write if the broker is down; cards expire on their own
+            logger.error('Failed to schedule listing card rebuild: %s', e)
+    
+    transaction.on_commit(enqueue)
@@ -0,0 +1,259 @@
+"""
+Pooled, concurrent email sending for the emails queue.
+
+A PooledMailer keeps SMTP connections open between sends instead of
+connecting once per message, and bounds how many sends are in flight with
+an adaptive window: the window grows slowly while the server accepts mail
+and halves (with a backoff) when the server throttles with a 4xx reply.
+
+One mailer is shared by every thread in a worker process, so running the
+emails queue on Celery's thread pool gives many concurrent sends per
+process over a handful of reused connections:
+
+    celery -A alx_travel_app worker -Q emails -P threads -c 32
+
+The thread pool does not enforce CELERY_TASK_TIME_LIMIT or
+CELERY_TASK_SOFT_TIME_LIMIT. A send is bounded by EMAIL_TIMEOUT per SMTP
+call and by EMAIL_THROTTLE_MAX_RETRIES backoffs instead.
+"""
+import atexit
+import os
+import queue
+import random
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.mail import get_connection
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Transient "slow down / try again later" replies
+THROTTLE_CODES = {421, 450, 451, 452, 454}
+
+
+def is_throttle(exc):
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return any(code in THROTTLE_CODES for code, _ in exc.recipients.values())
+    return isinstance(exc, smtplib.SMTPResponseException) and exc.smtp_code in THROTTLE_CODES
+
+
+class AdaptiveWindow:
+    """
+    Bounded number of in-flight sends. Grows by one slot after a full
+    window of successful sends, halves whenever the server throttles.
+    Other failures free their slot without counting either way.
+    """
+
+    def __init__(self, max_size, min_size=1):
+        self.max_size = max_size
+        self.min_size = min_size
+        self.size = max_size
+        self.in_flight = 0
+        self.throttles = 0
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= self.size:
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, sent=False, throttled=False):
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.throttles += 1
+                self.size = max(self.min_size, self.size // 2)
+                self._successes = 0
+            elif sent:
+                self._successes += 1
+                if self._successes >= self.size and self.size < self.max_size:
+                    self.size += 1
+                    self._successes = 0
+            self._cond.notify_all()
+
+
+class SMTPConnectionPool:
+    """
+    Reusable, already-open email backend connections, most recently used
+    first so spare connections can idle out. Connections idle for longer
+    than max_idle seconds are closed instead of reused, since servers drop
+    idle sessions.
+    """
+
+    def __init__(self, size, connection_factory=get_connection, max_idle=30.0):
+        self._connection_factory = connection_factory
+        self.max_idle = max_idle
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self, fresh=False):
+        """
+        An open connection: the most recently used idle one, or a newly
+        opened one when there is none or `fresh` is set
+        """
+        self._slots.acquire()
+        if not fresh:
+            connection = self._take_idle()
+            if connection is not None:
+                return connection
+        try:
+            connection = self._connection_factory(fail_silently=False)
+            connection.open()
+            return connection
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, connection, healthy=True):
+        if healthy:
+            self._idle.put((connection, time.monotonic()))
+        else:
+            self._discard(connection)
+        self._slots.release()
+
+    def drain(self):
+        """
+        Close every idle connection
+        """
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(connection)
+
+    def _take_idle(self):
+        while True:
+            try:
+                connection, released_at = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+            if time.monotonic() - released_at <= self.max_idle:
+                return connection
+            self._discard(connection)
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+class PooledMailer:
+    """
+    Send EmailMessages over pooled connections within an adaptive window.
+    Throttled sends are retried with exponential backoff. When the server
+    has dropped a pooled connection, the other idle ones are closed too and
+    the send is retried once on a newly opened connection.
+    """
+
+    def __init__(self, max_in_flight, max_retries=3, backoff=1.0,
+                 connection_factory=get_connection, max_idle=30.0):
+        self.window = AdaptiveWindow(max_in_flight)
+        self.pool = SMTPConnectionPool(max_in_flight, connection_factory, max_idle)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def send(self, message):
+        attempt = 0
+        reconnected = False
+        while True:
+            self.window.acquire()
+            sent = throttled = False
+            try:
+                result = self._send_once(message, fresh=reconnected)
+                sent = True
+                return result
+            except smtplib.SMTPServerDisconnected:
+                if reconnected:
+                    raise
+                # Idle connections are at least as old as the dropped one
+                self.pool.drain()
+                reconnected = True
+                continue
+            except smtplib.SMTPException as exc:
+                throttled = is_throttle(exc)
+                if not throttled or attempt >= self.max_retries:
+                    raise
+            finally:
+                self.window.release(sent=sent, throttled=throttled)
+
+            attempt += 1
+            if throttled:
+                delay = self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.0)
+                logger.warning('SMTP server throttled, retrying in %.2fs (window %d)', delay, self.window.size)
+                time.sleep(delay)
+
+    def send_many(self, messages):
+        """
+        Send messages concurrently. Returns one exception (or None) per
+        message, in order.
+        """
+        executor = self._get_executor()
+        futures = [executor.submit(self.send, message) for message in messages]
+        return [future.exception() for future in futures]
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.pool.drain()
+
+    def _send_once(self, message, fresh=False):
+        connection = self.pool.acquire(fresh=fresh)
+        healthy = False
+        try:
+            sent = connection.send_messages([message])
+            healthy = True
+            return sent
+        finally:
+            # After any error the SMTP session state is unknown, so the
+            # connection is dropped and a fresh one opened on demand
+            self.pool.release(connection, healthy=healthy)
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.window.max_size,
+                    thread_name_prefix='mailer',
+                )
+            return self._executor
+
+
+_mailer = None
+_mailer_pid = None
+_mailer_lock = threading.Lock()
+
+
+def get_mailer():
+    """
+    The mailer shared by all threads of the current process. A forked
+    Celery child builds its own rather than reusing the parent's sockets.
+    """
+    global _mailer, _mailer_pid
+    pid = os.getpid()
+    if _mailer_pid != pid:
+        with _mailer_lock:
+            if _mailer_pid != pid:
+                _mailer = PooledMailer(
+                    max_in_flight=settings.EMAIL_POOL_MAX_IN_FLIGHT,
+                    max_retries=settings.EMAIL_THROTTLE_MAX_RETRIES,
+                    backoff=settings.EMAIL_THROTTLE_BACKOFF,
+                    max_idle=settings.EMAIL_POOL_MAX_IDLE,
+                )
+                _mailer_pid = pid
+    return _mailer
+
+
+@atexit.register
+def _close_mailer():
+    if _mailer is not None and _mailer_pid == os.getpid():
+        _mailer.close()
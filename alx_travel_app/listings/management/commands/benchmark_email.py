@@ -0,0 +1,114 @@
+import asyncio
+import random
+import socket
+import time
+from functools import partial
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand, CommandError
+from listings.mailer import PooledMailer
+
+SMTP_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+
+class FakeSMTPHandler:
+    """
+    aiosmtpd handler that accepts mail after a delay and throttles a share
+    of messages with a 451 reply
+    """
+
+    def __init__(self, latency, throttle_rate):
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.accepted = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.latency)
+        if random.random() < self.throttle_rate:
+            return '451 4.7.1 Rate limited, try again later'
+        self.accepted += 1
+        return '250 Message accepted for delivery'
+
+class Command(BaseCommand):
+    help = 'Measure email sends/sec against a local fake SMTP server (requires aiosmtpd)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=500, help='Messages to send per mode')
+        parser.add_argument('--in-flight', type=int, default=16, help='Maximum concurrent sends for the pooled mailer')
+        parser.add_argument('--latency-ms', type=int, default=20, help='Server delay before accepting each message')
+        parser.add_argument('--throttle-rate', type=float, default=0.0, help='Share of messages answered with 451')
+
+    def handle(self, *args, **options):
+        try:
+            from aiosmtpd.controller import Controller
+        except ImportError:
+            raise CommandError('benchmark_email needs aiosmtpd: pip install aiosmtpd')
+
+        handler = FakeSMTPHandler(options['latency_ms'] / 1000, options['throttle_rate'])
+        port = self._free_port()
+        controller = Controller(handler, hostname='127.0.0.1', port=port)
+        controller.start()
+        connection_factory = partial(
+            get_connection,
+            SMTP_BACKEND,
+            host='127.0.0.1',
+            port=port,
+            username='',
+            password='',
+            use_tls=False,
+            use_ssl=False,
+        )
+
+        try:
+            self._sequential(connection_factory, handler, options['messages'])
+            self._pooled(connection_factory, handler, options['messages'], options['in_flight'])
+        finally:
+            controller.stop()
+
+    def _sequential(self, connection_factory, handler, count):
+        """
+        What send_mail() does: one new SMTP connection per message, one at a time
+        """
+        handler.accepted = 0
+        failed = 0
+        start = time.perf_counter()
+        for message in self._messages(count):
+            try:
+                connection_factory(fail_silently=False).send_messages([message])
+            except Exception:
+                failed += 1
+        self._report('send_mail (sequential)', handler.accepted, failed, time.perf_counter() - start)
+
+    def _pooled(self, connection_factory, handler, count, in_flight):
+        handler.accepted = 0
+        mailer = PooledMailer(in_flight, backoff=0.05, connection_factory=connection_factory)
+        start = time.perf_counter()
+        errors = mailer.send_many(self._messages(count))
+        elapsed = time.perf_counter() - start
+        mailer.close()
+
+        failed = sum(error is not None for error in errors)
+        self._report(f'PooledMailer (in-flight {in_flight})', handler.accepted, failed, elapsed)
+        self.stdout.write(
+            f'    throttled {mailer.window.throttles} times, window ended at {mailer.window.size}'
+        )
+
+    def _messages(self, count):
+        return [
+            EmailMessage(
+                subject=f'Benchmark {i}',
+                body='Booking confirmation benchmark',
+                from_email='noreply@alxtravel.com',
+                to=[f'guest{i}@example.com'],
+            )
+            for i in range(count)
+        ]
+
+    def _report(self, label, sent, failed, elapsed):
+        self.stdout.write(
+            f'{label}: {sent} sent, {failed} failed in {elapsed:.2f}s '
+            f'= {sent / elapsed:.1f} sends/sec'
+        )
+
+    def _free_port(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            return sock.getsockname()[1]
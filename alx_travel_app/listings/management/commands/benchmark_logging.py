@@ -0,0 +1,103 @@
+import logging
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from django.core.management.base import BaseCommand
+from alx_travel_app.log_handlers import QueuedRotatingFileHandler
+
+# What one booking request and one confirmation email task log on success
+WORKLOADS = {
+    'request': [
+        ('Email task triggered with ID: %s for booking %s', 'task_id', 'booking_id'),
+    ],
+    'task': [
+        ('Booking confirmation email sent successfully for booking %s', 'booking_id'),
+    ],
+}
+
+class Command(BaseCommand):
+    help = 'Compare logging overhead per request and per task for the sync and queued file handlers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20000,
+            help='Requests/tasks to simulate per handler',
+        )
+        parser.add_argument(
+            '--flush-latency-us',
+            type=int,
+            default=0,
+            help='Simulated storage latency added to every file flush',
+        )
+
+    def handle(self, *args, **options):
+        latency = options['flush_latency_us'] / 1_000_000
+
+        with tempfile.TemporaryDirectory() as log_dir:
+            handlers = {
+                'sync FileHandler': lambda: self._sync_handler(Path(log_dir) / 'sync.log', latency),
+                'QueuedRotatingFileHandler': lambda: self._queued_handler(Path(log_dir) / 'queued.log', latency),
+            }
+            for name, make_handler in handlers.items():
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                for workload in WORKLOADS:
+                    self._run(make_handler(), workload, options['iterations'])
+
+    def _sync_handler(self, filename, latency):
+        # The handler this project used before the queued pipeline
+        handler = logging.FileHandler(filename)
+        handler.setFormatter(logging.Formatter(
+            '[{levelname}] {asctime} {name} {process:d} {thread:d} {message}',
+            style='{',
+        ))
+        if latency:
+            handler.flush = self._slowed(handler.flush, latency)
+        return handler
+
+    def _queued_handler(self, filename, latency):
+        handler = QueuedRotatingFileHandler(filename)
+        if latency:
+            handler.target.flush_batch = self._slowed(handler.target.flush_batch, latency)
+        return handler
+
+    def _slowed(self, flush, latency):
+        def slow_flush():
+            time.sleep(latency)
+            flush()
+        return slow_flush
+
+    def _run(self, handler, workload, iterations):
+        logger = logging.getLogger(f'benchmark_logging.{workload}')
+        logger.handlers = [handler]
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+        timings = []
+        try:
+            for _ in range(iterations):
+                ids = {'task_id': str(uuid.uuid4()), 'booking_id': str(uuid.uuid4())}
+                start = time.perf_counter_ns()
+                for message, *fields in WORKLOADS[workload]:
+                    logger.info(
+                        message, *(ids[field] for field in fields),
+                        extra={field: ids[field] for field in fields}
+                    )
+                timings.append(time.perf_counter_ns() - start)
+        finally:
+            drain_start = time.perf_counter()
+            logger.handlers = []
+            handler.close()
+            drain_ms = (time.perf_counter() - drain_start) * 1000
+
+        timings.sort()
+        mean_us = statistics.fmean(timings) / 1000
+        p99_us = timings[int(len(timings) * 0.99)] / 1000
+        line = f'  per {workload}: mean {mean_us:.1f} us, p99 {p99_us:.1f} us'
+        dropped = getattr(handler, 'dropped', None)
+        if dropped is not None:
+            line += f' (dropped {dropped}, background drain {drain_ms:.0f} ms)'
+        self.stdout.write(line)
@@ -0,0 +1,123 @@
+import os
+import statistics
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Each profile boots a fresh interpreter the way the real process would.
+# The worker sets no settings module, like the celery program, so the
+# default chosen in celery.py is what gets measured.
+PROFILES = {
+    'manage': (
+        'alx_travel_app.settings',
+        'import django\n'
+        'django.setup()',
+    ),
+    'worker': (
+        None,
+        'from alx_travel_app.celery import app\n'
+        'import django\n'
+        'django.setup()\n'
+        'app.loader.import_default_modules()',
+    ),
+}
+
+SCRIPT = '''\
+import os, sys, time
+start = time.perf_counter()
+sys.path[:] = {path!r}
+{setup}
+{body}
+print((time.perf_counter() - start) * 1000)
+'''
+
+class Command(BaseCommand):
+    help = 'Measure cold start time of manage.py and Celery worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profile',
+            choices=sorted(PROFILES),
+            action='append',
+            help='Profile to measure (default: all)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Number of cold starts to time per profile',
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=10,
+            help='Number of slowest top-level imports to list',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Fail if a profile exceeds STARTUP_TIME_BUDGET_MS',
+        )
+
+    def handle(self, *args, **options):
+        over_budget = []
+
+        for name in options['profile'] or sorted(PROFILES):
+            timings = [self._cold_start(name)[0] for _ in range(options['repeat'])]
+            median = statistics.median(timings)
+            budget = settings.STARTUP_TIME_BUDGET_MS.get(name)
+
+            line = f'{name}: median {median:.0f} ms, min {min(timings):.0f} ms over {len(timings)} runs'
+            if budget is not None:
+                line += f' (budget {budget} ms)'
+            if budget is not None and median > budget:
+                over_budget.append(name)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(self.style.SUCCESS(line))
+
+            _, imports = self._cold_start(name, importtime=True)
+            for module, cumulative_us in imports[:options['top']]:
+                self.stdout.write(f'    {cumulative_us / 1000:8.1f} ms  {module}')
+
+        if options['check'] and over_budget:
+            raise CommandError(f'Startup budget exceeded: {", ".join(over_budget)}')
+
+    def _cold_start(self, name, importtime=False):
+        """
+        Boot a fresh interpreter for the profile. Returns the elapsed time
+        in milliseconds and, with importtime, the top-level imports sorted
+        by cumulative microseconds.
+        """
+        settings_module, body = PROFILES[name]
+        setup = f"os.environ['DJANGO_SETTINGS_MODULE'] = {settings_module!r}" if settings_module else ''
+        script = SCRIPT.format(path=sys.path, setup=setup, body=body)
+        command = [sys.executable]
+        if importtime:
+            command += ['-X', 'importtime']
+        command += ['-c', script]
+
+        env = {key: value for key, value in os.environ.items() if key != 'DJANGO_SETTINGS_MODULE'}
+        result = subprocess.run(command, capture_output=True, text=True, env=env)
+        if result.returncode != 0:
+            raise CommandError(f'{name} profile failed to start:\n{result.stderr}')
+
+        elapsed_ms = float(result.stdout.strip().splitlines()[-1])
+        imports = self._parse_importtime(result.stderr) if importtime else []
+        return elapsed_ms, imports
+
+    def _parse_importtime(self, output):
+        """
+        Top-level modules from `python -X importtime` output, slowest first
+        """
+        imports = []
+        for line in output.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            _, cumulative, module = line[len('import time:'):].split('|')
+            # Nested imports are indented beyond the single leading space
+            if module.startswith('  ') or not cumulative.strip().isdigit():
+                continue
+            imports.append((module.strip(), int(cumulative)))
+        return sorted(imports, key=lambda item: item[1], reverse=True)
@@ -4,19 +4,31 @@ from django.contrib.auth.models import User
 
 class ListingSerializer(serializers.ModelSerializer):
     host = serializers.StringRelatedField(read_only=True)
+    card = serializers.SerializerMethodField()
     
     class Meta:
         model = Listing
         fields = '__all__'
         read_only_fields = ['id', 'created_at', 'updated_at', 'host']
     
+    def get_card(self, obj):
+        return self.context['listing_cards'].get(str(obj.pk))
+    
+    def to_representation(self, instance):
+        # Cards are only attached where the view prefetched them
+        # (see ListingViewSet.get_card_serializer), never per object
+        if 'listing_cards' not in self.context:
+            self.fields.pop('card', None)
+        return super().to_representation(instance)
+    
     def create(self, validated_data):
         validated_data['host'] = self.context['request'].user
         return super().create(validated_data)
 
 # bookings/serializers.py
 from rest_framework import serializers
-from .models import Booking
+from django.conf import settings
+from .models import ArchivedBooking, Booking
 from listings.serializers import ListingSerializer
 
 class BookingSerializer(serializers.ModelSerializer):
@@ -40,4 +52,29 @@ class BookingSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         validated_data['guest'] = self.context['request'].user
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+class BulkBookingActionSerializer(serializers.Serializer):
+    booking_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=settings.BOOKING_BULK_ACTION_MAX,
+    )
+
+class BookingHistorySerializer(serializers.Serializer):
+    """
+    Flat, read-only representation shared by hot and archived bookings
+    """
+    id = serializers.UUIDField()
+    listing_id = serializers.UUIDField()
+    listing_title = serializers.CharField()
+    check_in_date = serializers.DateField()
+    check_out_date = serializers.DateField()
+    guests_count = serializers.IntegerField()
+    total_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    status = serializers.CharField()
+    created_at = serializers.DateTimeField()
+    archived = serializers.SerializerMethodField()
+    
+    def get_archived(self, obj):
+        return isinstance(obj, ArchivedBooking)
\ No newline at end of file
@@ -0,0 +1,24 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from bookings.models import Booking
+from .cards import card_key, schedule_card_refresh
+from .models import Listing
+
+
+@receiver(post_save, sender=Listing)
+def refresh_card_on_listing_save(sender, instance, **kwargs):
+    schedule_card_refresh([instance.pk])
+
+
+@receiver(post_delete, sender=Listing)
+def drop_card_on_listing_delete(sender, instance, **kwargs):
+    cache.delete(card_key(instance.pk))
+
+
+# No post_delete receiver for Booking: it would stop queryset.delete() in
+# the cleanup and archival jobs from using a single fast DELETE. Deletes
+# through the API refresh the card in BookingViewSet.perform_destroy().
+@receiver(post_save, sender=Booking)
+def refresh_card_on_booking_save(sender, instance, **kwargs):
+    schedule_card_refresh([instance.listing_id])
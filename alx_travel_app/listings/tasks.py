@@ -1,12 +1,31 @@
 from celery import shared_task
-from django.core.mail import send_mail
+from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.contrib.auth.models import User
 import logging
 
+# Make sure shared_task binds to the project app, which the
+# alx_travel_app package no longer imports eagerly
+import alx_travel_app.celery  # noqa: F401
+
 logger = logging.getLogger(__name__)
 
+def _send_email(subject, plain_message, html_message, recipient_list):
+    """
+    Send a plain text + HTML email through the process-wide PooledMailer
+    """
+    from listings.mailer import get_mailer
+    
+    message = EmailMultiAlternatives(
+        subject=subject,
+        body=plain_message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=recipient_list,
+    )
+    message.attach_alternative(html_message, 'text/html')
+    return get_mailer().send(message)
+
 @shared_task(bind=True, max_retries=3)
 def send_booking_confirmation_email(self, booking_id, user_id):
     """
@@ -34,27 +53,20 @@ def send_booking_confirmation_email(self, booking_id, user_id):
         html_message = render_to_string('emails/booking_confirmation.html', context)
         plain_message = render_to_string('emails/booking_confirmation.txt', context)
         
-        # Send email
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
+        # Send email over the worker's pooled SMTP connections
+        _send_email(subject, plain_message, html_message, [user.email])
         
-        logger.info(f'Booking confirmation email sent successfully for booking {booking_id}')
+        logger.info('Booking confirmation email sent successfully for booking %s', booking_id, extra={'booking_id': booking_id})
         return f'Email sent successfully to {user.email}'
         
     except Booking.DoesNotExist:
-        logger.error(f'Booking with id {booking_id} does not exist')
+        logger.error('Booking with id %s does not exist', booking_id, extra={'booking_id': booking_id})
         raise
     except User.DoesNotExist:
-        logger.error(f'User with id {user_id} does not exist')
+        logger.error('User with id %s does not exist', user_id, extra={'user_id': user_id})
         raise
     except Exception as exc:
-        logger.error(f'Error sending booking confirmation email: {str(exc)}')
+        logger.error('Error sending booking confirmation email: %s', exc, extra={'booking_id': booking_id})
         # Retry the task
         raise self.retry(exc=exc, countdown=60, max_retries=3)
 
@@ -80,20 +92,13 @@ def send_booking_reminder_email(booking_id):
         html_message = render_to_string('emails/booking_reminder.html', context)
         plain_message = render_to_string('emails/booking_reminder.txt', context)
         
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[booking.guest.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
+        _send_email(subject, plain_message, html_message, [booking.guest.email])
         
-        logger.info(f'Booking reminder email sent for booking {booking_id}')
+        logger.info('Booking reminder email sent for booking %s', booking_id, extra={'booking_id': booking_id})
         return f'Reminder email sent successfully'
         
     except Exception as exc:
-        logger.error(f'Error sending booking reminder email: {str(exc)}')
+        logger.error('Error sending booking reminder email: %s', exc, extra={'booking_id': booking_id})
         raise
 
 @shared_task
@@ -104,6 +109,7 @@ def cleanup_expired_bookings():
     from django.utils import timezone
     from datetime import timedelta
     from bookings.models import Booking
+    from listings.cards import schedule_card_refresh
     
     try:
         # Delete pending bookings older than 24 hours
@@ -113,12 +119,108 @@ def cleanup_expired_bookings():
             created_at__lt=expired_time
         )
         
-        count = expired_bookings.count()
-        expired_bookings.delete()
+        listing_ids = set(expired_bookings.values_list('listing_id', flat=True))
+        count, _ = expired_bookings.delete()
+        schedule_card_refresh(listing_ids)
         
-        logger.info(f'Cleaned up {count} expired bookings')
+        logger.info('Cleaned up %d expired bookings', count)
         return f'Cleaned up {count} expired bookings'
         
     except Exception as exc:
-        logger.error(f'Error cleaning up expired bookings: {str(exc)}')
+        logger.error('Error cleaning up expired bookings: %s', exc)
+        raise
+
+@shared_task
+def complete_past_bookings(batch_size=None):
+    """
+    Mark confirmed bookings whose stay has ended as completed,
+    in chunks so a large backlog never holds one long write lock
+    """
+    from django.utils import timezone
+    from bookings.models import Booking
+    from listings.cards import schedule_card_refresh
+    
+    batch_size = batch_size or settings.BOOKING_COMPLETION_BATCH_SIZE
+    
+    try:
+        today = timezone.localdate()
+        finished = Booking.objects.filter(
+            status=Booking.STATUS_CONFIRMED,
+            check_out_date__lt=today,
+        ).order_by()
+        
+        total = 0
+        listing_ids = set()
+        while True:
+            batch = list(finished.values_list('pk', 'listing_id')[:batch_size])
+            if not batch:
+                break
+            total += Booking.objects.filter(
+                pk__in=[pk for pk, _ in batch]
+            ).transition(Booking.STATUS_COMPLETED)
+            listing_ids.update(listing_id for _, listing_id in batch)
+        
+        schedule_card_refresh(listing_ids)
+        
+        logger.info('Marked %d bookings as completed', total)
+        return f'Marked {total} bookings as completed'
+        
+    except Exception as exc:
+        logger.error('Error completing past bookings: %s', exc)
+        raise
+
+@shared_task
+def archive_old_bookings():
+    """
+    Move old cancelled and completed bookings into the archive database
+    """
+    from django.utils import timezone
+    from datetime import timedelta
+    from bookings.archive import archive_bookings
+    
+    try:
+        cutoff = timezone.localdate() - timedelta(days=settings.BOOKING_ARCHIVE_AFTER_DAYS)
+        count = archive_bookings(cutoff)
+        
+        logger.info('Archived %d bookings that checked out before %s', count, cutoff)
+        return f'Archived {count} bookings'
+        
+    except Exception as exc:
+        logger.error('Error archiving bookings: %s', exc)
+        raise
+
+@shared_task
+def rebuild_listing_cards(listing_ids):
+    """
+    Rebuild the cached listing cards for the given listings
+    """
+    from listings.cards import refresh_listing_cards
+    
+    try:
+        cards = refresh_listing_cards(listing_ids)
+        logger.info('Rebuilt %d listing cards', len(cards))
+        return f'Rebuilt {len(cards)} listing cards'
+        
+    except Exception as exc:
+        logger.error('Error rebuilding listing cards: %s', exc)
+        raise
+
+@shared_task
+def update_trending_listings():
+    """
+    Refresh the precomputed trending listings rankings
+    """
+    from listings.trending import update_trending
+    
+    try:
+        published = update_trending()
+        if published is None:
+            logger.info('Trending update already running, skipped')
+            return 'Trending update already running'
+        
+        logger.info('Published %d trending rankings', published)
+        return f'Published {published} trending rankings'
+        
+    except Exception as exc:
+        logger.error('Error updating trending listings: %s', exc)
         raise
\ No newline at end of file
@@ -0,0 +1,296 @@
+import smtplib
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from bookings.models import Booking
+from .mailer import AdaptiveWindow, PooledMailer
+from .models import Listing
+from .trending import ANY, LOCK_KEY, get_trending, ranking_key, update_trending
+
+
+class FakeConnection:
+    """
+    Email backend connection whose sends follow a script: each entry is
+    an exception to raise, or None to accept the message
+    """
+
+    def __init__(self, script=()):
+        self.script = list(script)
+        self.opened = False
+        self.closed = False
+        self.sent = []
+
+    def open(self):
+        self.opened = True
+
+    def close(self):
+        self.closed = True
+
+    def send_messages(self, messages):
+        outcome = self.script.pop(0) if self.script else None
+        if outcome is not None:
+            raise outcome
+        self.sent.extend(messages)
+        return len(messages)
+
+
+class FakeConnectionFactory:
+    """
+    Hands out the queued connections in order, then healthy ones
+    """
+
+    def __init__(self, *connections):
+        self.queued = list(connections)
+        self.created = []
+
+    def __call__(self, fail_silently=False):
+        connection = self.queued.pop(0) if self.queued else FakeConnection()
+        self.created.append(connection)
+        return connection
+
+
+def throttle():
+    return smtplib.SMTPSenderRefused(421, b'Too many messages, slow down', 'noreply@alxtravel.com')
+
+
+class PooledMailerTests(SimpleTestCase):
+
+    def make_mailer(self, factory, max_in_flight=8, max_retries=3):
+        return PooledMailer(max_in_flight, max_retries=max_retries, backoff=0, connection_factory=factory)
+
+    def test_reuses_idle_connection(self):
+        factory = FakeConnectionFactory()
+        mailer = self.make_mailer(factory)
+
+        mailer.send('first')
+        mailer.send('second')
+
+        self.assertEqual(len(factory.created), 1)
+        self.assertEqual(factory.created[0].sent, ['first', 'second'])
+
+    def test_stale_connection_retried_on_new_connection(self):
+        stale = [FakeConnection([smtplib.SMTPServerDisconnected()]) for _ in range(2)]
+        factory = FakeConnectionFactory(*stale)
+        mailer = self.make_mailer(factory)
+        idle = [mailer.pool.acquire() for _ in stale]
+        for connection in idle:
+            mailer.pool.release(connection)
+
+        self.assertEqual(mailer.send('message'), 1)
+
+        # The retry did not pick up the other stale idle connection
+        self.assertEqual(len(factory.created), 3)
+        self.assertEqual(factory.created[2].sent, ['message'])
+        self.assertTrue(all(connection.closed for connection in stale))
+
+    def test_disconnect_on_new_connection_raises(self):
+        factory = FakeConnectionFactory(
+            FakeConnection([smtplib.SMTPServerDisconnected()]),
+            FakeConnection([smtplib.SMTPServerDisconnected()]),
+        )
+        mailer = self.make_mailer(factory)
+
+        with self.assertRaises(smtplib.SMTPServerDisconnected):
+            mailer.send('message')
+        self.assertEqual(len(factory.created), 2)
+
+    def test_connection_idle_past_max_idle_is_not_reused(self):
+        factory = FakeConnectionFactory()
+        mailer = self.make_mailer(factory)
+        mailer.send('first')
+
+        with mock.patch('listings.mailer.time.monotonic', return_value=10 ** 9):
+            mailer.send('second')
+
+        self.assertEqual(len(factory.created), 2)
+        self.assertTrue(factory.created[0].closed)
+        self.assertEqual(factory.created[1].sent, ['second'])
+
+    def test_throttle_halves_window_and_retries(self):
+        factory = FakeConnectionFactory(FakeConnection([throttle()]))
+        mailer = self.make_mailer(factory, max_in_flight=8)
+
+        with self.assertLogs('listings.mailer', 'WARNING'):
+            self.assertEqual(mailer.send('message'), 1)
+
+        self.assertEqual(mailer.window.size, 4)
+        self.assertEqual(mailer.window.throttles, 1)
+        self.assertEqual(factory.created[-1].sent, ['message'])
+
+    def test_throttle_gives_up_after_max_retries(self):
+        factory = FakeConnectionFactory(*(FakeConnection([throttle()]) for _ in range(3)))
+        mailer = self.make_mailer(factory, max_in_flight=8, max_retries=2)
+
+        with self.assertLogs('listings.mailer', 'WARNING'), self.assertRaises(smtplib.SMTPSenderRefused):
+            mailer.send('message')
+
+        self.assertEqual(mailer.window.size, 1)
+        self.assertEqual(mailer.window.in_flight, 0)
+
+    def test_failures_do_not_grow_window(self):
+        factory = FakeConnectionFactory(*(
+            FakeConnection([OSError('timed out')]) for _ in range(10)
+        ))
+        mailer = self.make_mailer(factory, max_in_flight=8)
+        mailer.window.acquire()
+        mailer.window.release(throttled=True)
+
+        for _ in range(10):
+            with self.assertRaises(OSError):
+                mailer.send('message')
+
+        self.assertEqual(mailer.window.size, 4)
+        self.assertEqual(mailer.window.in_flight, 0)
+
+
+class AdaptiveWindowTests(SimpleTestCase):
+
+    def cycle(self, window, **outcome):
+        window.acquire()
+        window.release(**outcome)
+
+    def test_halves_on_throttle_down_to_min_size(self):
+        window = AdaptiveWindow(max_size=8, min_size=2)
+
+        for expected in (4, 2, 2):
+            self.cycle(window, throttled=True)
+            self.assertEqual(window.size, expected)
+        self.assertEqual(window.throttles, 3)
+
+    def test_grows_one_slot_per_full_window_of_successes(self):
+        window = AdaptiveWindow(max_size=4)
+        self.cycle(window, throttled=True)
+        self.assertEqual(window.size, 2)
+
+        for _ in range(2):
+            self.cycle(window, sent=True)
+        self.assertEqual(window.size, 3)
+
+        for _ in range(3):
+            self.cycle(window, sent=True)
+        self.assertEqual(window.size, 4)
+
+        for _ in range(10):
+            self.cycle(window, sent=True)
+        self.assertEqual(window.size, 4)
+
+    def test_release_without_success_does_not_count(self):
+        window = AdaptiveWindow(max_size=4)
+        self.cycle(window, throttled=True)
+
+        for _ in range(10):
+            self.cycle(window)
+        self.assertEqual(window.size, 2)
+        self.assertEqual(window.in_flight, 0)
+
+
+class RankingKeyTests(SimpleTestCase):
+
+    def test_non_latin_locations_get_their_own_key(self):
+        keys = {ranking_key(), ranking_key('東京'), ranking_key('Москва'), ranking_key('!!!')}
+        self.assertEqual(len(keys), 4)
+        self.assertEqual(ranking_key('東京'), ranking_key(' 東京 '))
+
+    def test_filters_are_normalised(self):
+        self.assertEqual(ranking_key('São Paulo', 'House'), ranking_key('são paulo', 'house'))
+        self.assertEqual(ranking_key('', ''), ranking_key())
+        self.assertTrue(ranking_key().endswith(f':{ANY}:{ANY}'))
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    TRENDING_WINDOW_HOURS=24,
+    TRENDING_TOP_N=10,
+    TRENDING_RECOUNT_HOURS=2,
+    TRENDING_REBUILD_HOURS=6,
+)
+@mock.patch('listings.signals.schedule_card_refresh')
+class UpdateTrendingTests(TestCase):
+    now = datetime(2026, 1, 10, 12, 30, tzinfo=timezone.utc)
+
+    def setUp(self):
+        cache.clear()
+        self.host = User.objects.create(username='host')
+        self.guest = User.objects.create(username='guest')
+        self.paris = self.make_listing('Paris')
+        self.tokyo = self.make_listing('東京')
+
+    def make_listing(self, location):
+        return Listing.objects.create(
+            title=f'Flat in {location}',
+            description='Test listing',
+            location=location,
+            price_per_night=100,
+            property_type='apartment',
+            max_guests=2,
+            host=self.host,
+        )
+
+    def book(self, listing, created_at, count=1):
+        bookings = []
+        for _ in range(count):
+            booking = Booking.objects.create(
+                listing=listing,
+                guest=self.guest,
+                check_in_date=created_at.date(),
+                check_out_date=created_at.date() + timedelta(days=2),
+                guests_count=1,
+            )
+            bookings.append(booking)
+        # created_at is auto_now_add, so backdate it afterwards
+        Booking.objects.filter(pk__in=[booking.pk for booking in bookings]).update(created_at=created_at)
+        return bookings
+
+    def scores(self, **filters):
+        return {listing_id: score for listing_id, score in get_trending(**filters)}
+
+    def test_ranks_by_bookings_per_location(self, _):
+        self.book(self.paris, self.now - timedelta(hours=3), count=2)
+        self.book(self.tokyo, self.now - timedelta(hours=3))
+
+        update_trending(now=self.now)
+
+        self.assertEqual(get_trending(), [[str(self.paris.pk), 2], [str(self.tokyo.pk), 1]])
+        self.assertEqual(self.scores(location='東京'), {str(self.tokyo.pk): 1})
+
+    def test_late_committed_booking_is_counted_once(self, _):
+        self.book(self.paris, self.now - timedelta(hours=5))
+        update_trending(now=self.now)
+
+        # Committed after the first run, with an earlier created_at
+        self.book(self.paris, self.now - timedelta(minutes=30))
+        update_trending(now=self.now + timedelta(minutes=10))
+        update_trending(now=self.now + timedelta(minutes=20))
+
+        self.assertEqual(self.scores(), {str(self.paris.pk): 2})
+
+    def test_cancellation_corrected_on_rebuild(self, _):
+        [booking] = self.book(self.paris, self.now - timedelta(hours=10))
+        self.book(self.tokyo, self.now - timedelta(hours=10))
+        update_trending(now=self.now)
+
+        Booking.objects.filter(pk=booking.pk).transition(Booking.STATUS_CANCELLED)
+        update_trending(now=self.now + timedelta(hours=1))
+        self.assertEqual(self.scores(), {str(self.paris.pk): 1, str(self.tokyo.pk): 1})
+
+        update_trending(now=self.now + timedelta(hours=6))
+        self.assertEqual(self.scores(), {str(self.tokyo.pk): 1})
+        self.assertEqual(self.scores(location='Paris'), {})
+
+    def test_hours_slide_out_of_the_window(self, _):
+        self.book(self.paris, self.now - timedelta(hours=23))
+        self.book(self.tokyo, self.now - timedelta(hours=1))
+        update_trending(now=self.now)
+        self.assertEqual(self.scores(), {str(self.paris.pk): 1, str(self.tokyo.pk): 1})
+
+        update_trending(now=self.now + timedelta(hours=2))
+
+        self.assertEqual(self.scores(), {str(self.tokyo.pk): 1})
+        self.assertEqual(self.scores(location='Paris'), {})
+
+    def test_skips_while_another_run_holds_the_lock(self, _):
+        cache.add(LOCK_KEY, True)
+
+        self.assertIsNone(update_trending(now=self.now))
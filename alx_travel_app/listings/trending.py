@@ -0,0 +1,150 @@
+"""
+Precomputed "trending listings" rankings.
+
+The update_trending_listings task keeps per-hour booking counts for the
+last TRENDING_WINDOW_HOURS in the cache. Each run recounts only the last
+TRENDING_RECOUNT_HOURS, which picks up bookings that committed late with
+an earlier created_at, and drops hours that slid out of the window. Every
+TRENDING_REBUILD_HOURS the whole window is recounted so cancellations and
+deletions in older hours are corrected as well. It then stores the top TRENDING_TOP_N listings for every
+(location, property_type) combination, including "any", as compact
+[listing id, score] lists. Serving a ranking is a single cache.get().
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+from django.utils.text import slugify
+from .models import Listing
+
+TRENDING_VERSION = 2
+
+STATE_KEY = f'trending:v{TRENDING_VERSION}:state'
+LOCK_KEY = f'trending:v{TRENDING_VERSION}:lock'
+
+ANY = '*'
+
+
+def ranking_key(location=None, property_type=None):
+    return f'trending:v{TRENDING_VERSION}:{_key_part(location)}:{_key_part(property_type)}'
+
+
+def _key_part(value):
+    """
+    Case- and punctuation-insensitive cache key fragment for a filter.
+    Non-Latin text is kept rather than stripped, and a value with no word
+    characters at all is hashed, so neither falls back to the "any" ranking.
+    """
+    value = (value or '').strip()
+    if not value:
+        return ANY
+    return slugify(value, allow_unicode=True) or hashlib.md5(value.lower().encode()).hexdigest()[:12]
+
+
+def get_trending(location=None, property_type=None):
+    """
+    Precomputed [[listing id, score], ...] for the filters, best first
+    """
+    return cache.get(ranking_key(location, property_type)) or []
+
+
+def update_trending(now=None):
+    """
+    Recount the recent hours (or the whole window when a rebuild is due),
+    slide the window forward and republish the rankings. Returns the number
+    of rankings published, or None if another run holds the lock.
+    """
+    from bookings.models import Booking
+
+    if not cache.add(LOCK_KEY, True, timeout=settings.TRENDING_LOCK_TIMEOUT):
+        return None
+
+    try:
+        now = now or timezone.now()
+        window_start = now - timedelta(hours=settings.TRENDING_WINDOW_HOURS)
+
+        # Without state (first run or evicted) the whole window is rebuilt
+        state = cache.get(STATE_KEY) or {}
+        rebuilt_at = state.get('rebuilt_at')
+        if rebuilt_at is None or now - rebuilt_at >= timedelta(hours=settings.TRENDING_REBUILD_HOURS):
+            recount_from = window_start
+            rebuilt_at = now
+        else:
+            recount_from = max(now - timedelta(hours=settings.TRENDING_RECOUNT_HOURS), window_start)
+
+        # Recounted hours replace their buckets rather than adding to them,
+        # so rows seen by an earlier run are never counted twice
+        first_hour = _hour(recount_from)
+        oldest_hour = _hour(window_start)
+        buckets = {
+            hour: counts for hour, counts in state.get('buckets', {}).items()
+            if oldest_hour <= hour < first_hour
+        }
+
+        recounted = (
+            Booking.objects.filter(
+                created_at__gte=datetime.fromtimestamp(first_hour * 3600, tz=dt_timezone.utc),
+                created_at__lte=now,
+            )
+            .exclude(status=Booking.STATUS_CANCELLED)
+            .annotate(hour=TruncHour('created_at'))
+            .order_by()
+            .values('hour', 'listing_id')
+            .annotate(count=Count('pk'))
+        )
+        for row in recounted:
+            buckets.setdefault(_hour(row['hour']), {})[str(row['listing_id'])] = row['count']
+
+        rankings = _rank(buckets)
+        cache.set_many(rankings, timeout=None)
+        stale = set(state.get('ranking_keys', ())) - set(rankings)
+        if stale:
+            cache.delete_many(stale)
+
+        cache.set(
+            STATE_KEY,
+            {'rebuilt_at': rebuilt_at, 'buckets': buckets, 'ranking_keys': sorted(rankings)},
+            timeout=None,
+        )
+        return len(rankings)
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def _hour(moment):
+    return int(moment.timestamp()) // 3600
+
+
+def _rank(buckets):
+    """
+    Top-N [listing id, score] lists for every filter combination
+    """
+    scores = {}
+    for counts in buckets.values():
+        for listing_id, count in counts.items():
+            scores[listing_id] = scores.get(listing_id, 0) + count
+
+    listings = Listing.objects.filter(pk__in=list(scores), is_available=True).values_list(
+        'id', 'location', 'property_type'
+    )
+
+    groups = {}
+    for listing_id, location, property_type in listings:
+        listing_id = str(listing_id)
+        entry = [listing_id, scores[listing_id]]
+        for key in {
+            ranking_key(),
+            ranking_key(location=location),
+            ranking_key(property_type=property_type),
+            ranking_key(location, property_type),
+        }:
+            groups.setdefault(key, []).append(entry)
+
+    top_n = settings.TRENDING_TOP_N
+    return {
+        key: sorted(entries, key=lambda entry: (-entry[1], entry[0]))[:top_n]
+        for key, entries in groups.items()
+    }
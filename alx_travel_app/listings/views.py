@@ -1,17 +1,66 @@
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.conf import settings
+from .cards import get_listing_cards, get_listing_cards_by_id
 from .models import Listing
 from .serializers import ListingSerializer
+from .trending import get_trending
 
 class ListingViewSet(viewsets.ModelViewSet):
-    queryset = Listing.objects.filter(is_available=True)
+    queryset = Listing.objects.filter(is_available=True).select_related('host')
     serializer_class = ListingSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     
     def perform_create(self, serializer):
         serializer.save(host=self.request.user)
     
+    def get_card_serializer(self, instance, many=False):
+        """
+        Serializer with the listings' cached cards in its context, fetched
+        in a single cache round trip
+        """
+        context = self.get_serializer_context()
+        context['listing_cards'] = get_listing_cards(instance if many else [instance])
+        return self.get_serializer(instance, many=many, context=context)
+    
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_card_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_card_serializer(list(queryset), many=True)
+        return Response(serializer.data)
+    
+    def retrieve(self, request, *args, **kwargs):
+        serializer = self.get_card_serializer(self.get_object())
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def trending(self, request):
+        """
+        Most booked listings over the trending window, optionally filtered
+        by ?location= and ?property_type=, served from precomputed rankings
+        """
+        try:
+            limit = min(int(request.query_params.get('limit', settings.TRENDING_TOP_N)), settings.TRENDING_TOP_N)
+        except ValueError:
+            limit = settings.TRENDING_TOP_N
+        
+        ranking = get_trending(
+            location=request.query_params.get('location'),
+            property_type=request.query_params.get('property_type'),
+        )[:max(limit, 0)]
+        cards = get_listing_cards_by_id([listing_id for listing_id, _ in ranking])
+        
+        results = [
+            {'score': score, **cards[listing_id]}
+            for listing_id, score in ranking
+            if listing_id in cards and cards[listing_id]['availability']['is_available']
+        ]
+        return Response({'count': len(results), 'results': results})
+    
     @action(detail=True, methods=['get'])
     def availability(self, request, pk=None):
         listing = self.get_object()
@@ -19,11 +68,15 @@ class ListingViewSet(viewsets.ModelViewSet):
         return Response({'available': listing.is_available})
 
 # bookings/views.py
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from .models import Booking
-from .serializers import BookingSerializer
+from .serializers import BookingSerializer, BookingHistorySerializer, BulkBookingActionSerializer
+from .archive import booking_history
+from listings.cards import schedule_card_refresh
 from listings.tasks import send_booking_confirmation_email
 from listings.models import Listing
 import logging
@@ -35,7 +88,7 @@ class BookingViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Booking.objects.filter(guest=self.request.user)
+        return Booking.objects.filter(guest=self.request.user).select_related('listing__host')
     
     def create(self, request, *args, **kwargs):
         """
@@ -69,9 +122,15 @@ class BookingViewSet(viewsets.ModelViewSet):
                     str(booking.id), 
                     request.user.id
                 )
-                logger.info(f'Email task triggered with ID: {task.id} for booking {booking.id}')
+                logger.info(
+                    'Email task triggered with ID: %s for booking %s', task.id, booking.id,
+                    extra={'task_id': task.id, 'booking_id': booking.id}
+                )
             except Exception as e:
-                logger.error(f'Failed to trigger email task for booking {booking.id}: {str(e)}')
+                logger.error(
+                    'Failed to trigger email task for booking %s: %s', booking.id, e,
+                    extra={'booking_id': booking.id}
+                )
                 # Don't fail the booking creation if email fails
             
             headers = self.get_success_headers(serializer.data)
@@ -85,25 +144,71 @@ class BookingViewSet(viewsets.ModelViewSet):
             )
             
         except Exception as e:
-            logger.error(f'Error creating booking: {str(e)}')
+            logger.error('Error creating booking: %s', e)
             return Response(
                 {'error': 'Failed to create booking'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    def perform_destroy(self, instance):
+        listing_id = instance.listing_id
+        instance.delete()
+        schedule_card_refresh([listing_id])
+    
+    def _transition(self, pk, new_status, success_message, error_message):
+        """
+        Apply a status transition to one of the user's bookings with a
+        single conditional UPDATE instead of get_object() + save()
+        """
+        try:
+            # A malformed UUID fails in filter(), before any query runs
+            bookings = self.get_queryset().filter(pk=pk)
+            updated = bookings.transition(new_status)
+        except DjangoValidationError:
+            raise Http404
+        if updated:
+            schedule_card_refresh(bookings.values_list('listing_id', flat=True))
+            return Response({'message': success_message})
+        if not bookings.exists():
+            raise Http404
+        return Response(
+            {'error': error_message}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    def _bulk_transition(self, request, new_status, verb):
+        """
+        Apply a status transition to many bookings on the host's listings
+        """
+        serializer = BulkBookingActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        booking_ids = serializer.validated_data['booking_ids']
+        
+        bookings = Booking.objects.for_host(request.user).filter(id__in=booking_ids)
+        updated = bookings.transition(new_status)
+        if updated:
+            schedule_card_refresh(bookings.values_list('listing_id', flat=True))
+        
+        logger.info(
+            'Host %s %s %d of %d bookings',
+            request.user.id, verb, updated, len(booking_ids)
+        )
+        return Response({
+            'message': f'{updated} booking(s) {verb}',
+            'requested': len(booking_ids),
+            'updated': updated,
+        })
+    
     @action(detail=True, methods=['post'])
     def confirm(self, request, pk=None):
         """
         Confirm a booking
         """
-        booking = self.get_object()
-        if booking.status == 'pending':
-            booking.status = 'confirmed'
-            booking.save()
-            return Response({'message': 'Booking confirmed successfully'})
-        return Response(
-            {'error': 'Booking cannot be confirmed'}, 
-            status=status.HTTP_400_BAD_REQUEST
+        return self._transition(
+            pk,
+            Booking.STATUS_CONFIRMED,
+            'Booking confirmed successfully',
+            'Booking cannot be confirmed',
         )
     
     @action(detail=True, methods=['post'])
@@ -111,12 +216,36 @@ class BookingViewSet(viewsets.ModelViewSet):
         """
         Cancel a booking
         """
-        booking = self.get_object()
-        if booking.status in ['pending', 'confirmed']:
-            booking.status = 'cancelled'
-            booking.save()
-            return Response({'message': 'Booking cancelled successfully'})
-        return Response(
-            {'error': 'Booking cannot be cancelled'}, 
-            status=status.HTTP_400_BAD_REQUEST
-        )
\ No newline at end of file
+        return self._transition(
+            pk,
+            Booking.STATUS_CANCELLED,
+            'Booking cancelled successfully',
+            'Booking cannot be cancelled',
+        )
+    
+    @action(detail=False, methods=['post'], url_path='bulk-confirm')
+    def bulk_confirm(self, request):
+        """
+        Confirm many pending bookings on the current user's listings
+        """
+        return self._bulk_transition(request, Booking.STATUS_CONFIRMED, 'confirmed')
+    
+    @action(detail=False, methods=['post'], url_path='bulk-cancel')
+    def bulk_cancel(self, request):
+        """
+        Cancel many pending or confirmed bookings on the current user's listings
+        """
+        return self._bulk_transition(request, Booking.STATUS_CANCELLED, 'cancelled')
+    
+    @action(detail=False, methods=['get'])
+    def history(self, request):
+        """
+        List the user's bookings, including archived ones
+        """
+        history = booking_history(request.user)
+        page = self.paginate_queryset(history)
+        if page is not None:
+            serializer = BookingHistorySerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = BookingHistorySerializer(history[:], many=True)
+        return Response(serializer.data)
\ No newline at end of file
@@ -0,0 +1,301 @@
+"""
+Non-blocking structured logging.
+
+QueuedRotatingFileHandler is a drop-in LOGGING handler: the thread that
+logs only snapshots the record and puts it on a bounded queue. A listener
+thread wakes at most once per flush interval, renders everything queued
+as JSON lines into a size-rotated file and flushes once per batch instead
+of once per record.
+
+Rotation needs a single writing process per file. Put `{pid}` in the
+filename and every process, including forked Celery children, writes and
+rotates a file of its own. Files of exited processes are deleted once they
+have not been written for `retention` seconds.
+
+Prefork children exit with os._exit(), which skips logging.shutdown(), so
+the worker must call close_handlers() on the way out (celery.py connects
+it to worker_process_shutdown). Otherwise records still queued are lost.
+"""
+import copy
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import weakref
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, RotatingFileHandler
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+RESERVED_ATTRS = frozenset(
+    vars(logging.LogRecord('', logging.INFO, '', 0, '', (), None))
+) | {'message', 'asctime'}
+
+_STOP = object()
+
+# Every QueuedRotatingFileHandler created in this process
+_handlers = weakref.WeakSet()
+
+
+def close_handlers(**kwargs):
+    """
+    Drain and close every QueuedRotatingFileHandler in this process.
+    Accepts and ignores signal arguments so it can be connected to
+    Celery's worker_process_shutdown.
+    """
+    for handler in list(_handlers):
+        handler.close()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    One JSON object per record, including any `extra` fields
+    """
+
+    def format(self, record):
+        payload = {
+            'timestamp': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.process,
+            'thread': record.thread,
+        }
+        for key, value in record.__dict__.items():
+            if key not in RESERVED_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exc_info'] = record.exc_text
+        if record.stack_info:
+            payload['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(payload, default=str)
+
+
+class _BatchedRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that leaves flushing to the listener thread
+    """
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+
+class _BatchingListener(threading.Thread):
+    """
+    Drains the queue in batches: blocks for the first record, lets more
+    accumulate for flush_interval seconds, then writes everything queued
+    (up to batch_size) before one flush. Records the handler dropped are
+    reported in the same file, at most once per drop_report_interval and
+    once more on stop.
+    """
+
+    def __init__(self, handler, batch_size, flush_interval, drop_report_interval):
+        super().__init__(name='log-listener', daemon=True)
+        self.handler = handler
+        self.queue = handler.queue
+        self.target = handler.target
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.drop_report_interval = drop_report_interval
+        self.stopping = threading.Event()
+        self.reported_dropped = 0
+        self.last_report = time.monotonic()
+
+    def run(self):
+        try:
+            self.handler.remove_expired_files()
+        except OSError:
+            pass
+        backlog = False
+        while True:
+            batch = [self.queue.get()]
+            if batch[0] is not _STOP and not backlog:
+                # Waking per record would contend with the logging threads
+                # for the GIL; waiting lets a batch build up instead
+                self.stopping.wait(self.flush_interval)
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            backlog = len(batch) >= self.batch_size
+            stop = False
+            for record in batch:
+                if record is _STOP:
+                    stop = True
+                else:
+                    self.target.handle(record)
+            now = time.monotonic()
+            if stop or now - self.last_report >= self.drop_report_interval:
+                self.report_dropped()
+                self.last_report = now
+            self.target.flush_batch()
+            if stop:
+                return
+
+    def report_dropped(self):
+        dropped = self.handler.dropped
+        if dropped == self.reported_dropped:
+            return
+        record = logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            'Log queue full: dropped %d records (%d since start)',
+            (dropped - self.reported_dropped, dropped), None,
+        )
+        record.dropped = dropped
+        self.reported_dropped = dropped
+        self.target.handle(record)
+
+    def stop(self, timeout=5.0):
+        self.stopping.set()
+        # Blocking put: the sentinel must not be dropped like a record
+        self.queue.put(_STOP)
+        self.join(timeout)
+
+
+class QueuedRotatingFileHandler(QueueHandler):
+    """
+    Write JSON log lines to a rotating file from a background thread.
+
+    When the queue is full, records are dropped and counted in `dropped`
+    rather than blocking the caller, and the listener logs a warning with
+    the count. The listener thread starts on the first record in each
+    process, so it also works in forked Celery children.
+
+    `{pid}` in the filename is replaced with the writing process id; a
+    process forked after the handler was created switches to its own file,
+    whether or not its parent logged first. Without it, forked children
+    only append and never rotate, and lines they write after the parent
+    rotates land in the backup file.
+
+    In a forking worker, close_handlers() must run before each child
+    exits, see the module docstring.
+    """
+
+    def __init__(self, filename, max_bytes=10 * 1024 * 1024, backup_count=5,
+                 queue_size=10000, batch_size=1000, flush_interval=0.05,
+                 drop_report_interval=60.0, retention=7 * 24 * 60 * 60, encoding='utf-8'):
+        self.filename = os.fspath(filename)
+        self.retention = retention
+        self._owner_pid = os.getpid()
+        # Created before this handler so logging.shutdown() closes it last,
+        # after close() below has drained the queue into it
+        self.target = _BatchedRotatingFileHandler(
+            self._filename_for(os.getpid()),
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding=encoding,
+            delay=True,
+        )
+        self.target.setFormatter(JSONFormatter())
+        super().__init__(queue.Queue(queue_size))
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.drop_report_interval = drop_report_interval
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        _handlers.add(self)
+
+    def _filename_for(self, pid):
+        return self.filename.replace('{pid}', str(pid))
+
+    def remove_expired_files(self):
+        """
+        Delete the files, backups included, of processes that have exited
+        and have not written for `retention` seconds. Only applies when
+        the filename contains `{pid}`.
+        """
+        directory, name = os.path.split(os.path.abspath(self.filename))
+        if not self.retention or '{pid}' not in name:
+            return
+        prefix, suffix = name.split('{pid}', 1)
+        pattern = re.compile(rf'{re.escape(prefix)}(\d+){re.escape(suffix)}(\.\d+)?')
+        cutoff = time.time() - self.retention
+        for entry in os.scandir(directory):
+            match = pattern.fullmatch(entry.name)
+            if match is None or _pid_alive(int(match.group(1))):
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def setFormatter(self, fmt):
+        # Records are rendered on the listener thread, by the target
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        """
+        Snapshot the record in the calling thread. Merging args into the
+        message means later changes to them can't alter the log line, and
+        tracebacks can't be rendered once the frames are gone. Serialising
+        is left to the listener.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_listener(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._start_lock:
+            if self._pid == pid:
+                return
+            if pid != self._owner_pid:
+                # Forked: the parent's listener thread doesn't exist here,
+                # and records it had not written (or dropped) belong to the
+                # parent. The file is reopened by this process on its first
+                # write, and only rotated if no other process writes to it.
+                self.queue = queue.Queue(self.queue.maxsize)
+                self.dropped = 0
+                self.target.stream = None
+                if '{pid}' in self.filename:
+                    self.target.baseFilename = os.path.abspath(self._filename_for(pid))
+                else:
+                    self.target.maxBytes = 0
+            self._listener = _BatchingListener(
+                self, self.batch_size, self.flush_interval, self.drop_report_interval
+            )
+            self._listener.start()
+            self._pid = pid
+
+    def close(self):
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+            self._pid = None
+        self.target.close()
+        super().close()
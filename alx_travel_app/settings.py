@@ -1,5 +1,6 @@
 
 import os
+from importlib.util import find_spec
 from pathlib import Path
 from decouple import config, Csv
 
@@ -29,7 +30,6 @@ INSTALLED_APPS = [
     # Third-party apps
     'rest_framework',
     'corsheaders',
-    'django_extensions',
     
     # Local apps
     'listings',
@@ -74,9 +74,16 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Cancelled and completed bookings are moved here by archive_bookings
+    'archive': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'archive.sqlite3',
+    },
 }
 
+DATABASE_ROUTERS = ['bookings.routers.ArchiveRouter']
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -165,12 +172,28 @@ CELERY_WORKER_PREFETCH_MULTIPLIER = 1
 CELERY_TASK_ACKS_LATE = True
 CELERY_WORKER_MAX_TASKS_PER_CHILD = 1000
 
+# Task modules are listed explicitly instead of autodiscovered, so workers
+# don't probe every installed app for a tasks module
+CELERY_IMPORTS = ['listings.tasks']
+
 # Celery beat configuration for periodic tasks
 CELERY_BEAT_SCHEDULE = {
     'cleanup-expired-bookings': {
         'task': 'listings.tasks.cleanup_expired_bookings',
         'schedule': 3600.0,  # Run every hour
     },
+    'complete-past-bookings': {
+        'task': 'listings.tasks.complete_past_bookings',
+        'schedule': 3600.0,  # Run every hour
+    },
+    'update-trending-listings': {
+        'task': 'listings.tasks.update_trending_listings',
+        'schedule': 600.0,  # Run every 10 minutes
+    },
+    'archive-old-bookings': {
+        'task': 'listings.tasks.archive_old_bookings',
+        'schedule': 86400.0,  # Run daily
+    },
 }
 
 # Celery task routing
@@ -178,17 +201,20 @@ CELERY_TASK_ROUTES = {
     'listings.tasks.send_booking_confirmation_email': {'queue': 'emails'},
     'listings.tasks.send_booking_reminder_email': {'queue': 'emails'},
     'listings.tasks.cleanup_expired_bookings': {'queue': 'cleanup'},
+    'listings.tasks.complete_past_bookings': {'queue': 'cleanup'},
+    'listings.tasks.archive_old_bookings': {'queue': 'cleanup'},
 }
 
-# Celery task annotations for rate limiting
+# Celery task annotations. Email tasks have no rate_limit: the mailer's
+# adaptive window (EMAIL_POOL_MAX_IN_FLIGHT) backs off when the SMTP server
+# throttles, and a fixed per-worker rate would cap throughput below it.
 CELERY_TASK_ANNOTATIONS = {
     'listings.tasks.send_booking_confirmation_email': {
-        'rate_limit': '50/m',  # 50 emails per minute
+        'time_limit': 300,  # 5 minutes hard time limit
         'max_retries': 3,
         'default_retry_delay': 60,
     },
     'listings.tasks.send_booking_reminder_email': {
-        'rate_limit': '30/m',  # 30 reminder emails per minute
         'max_retries': 3,
         'default_retry_delay': 60,
     },
@@ -208,6 +234,15 @@ SERVER_EMAIL = DEFAULT_FROM_EMAIL
 # Email timeout settings
 EMAIL_TIMEOUT = 30
 
+# Pooled sending (listings.mailer): SMTP connections are reused across tasks
+# and at most EMAIL_POOL_MAX_IN_FLIGHT sends run at once per worker process,
+# fewer while the server is throttling
+EMAIL_POOL_MAX_IN_FLIGHT = config('EMAIL_POOL_MAX_IN_FLIGHT', default=16, cast=int)
+EMAIL_THROTTLE_MAX_RETRIES = config('EMAIL_THROTTLE_MAX_RETRIES', default=3, cast=int)
+EMAIL_THROTTLE_BACKOFF = config('EMAIL_THROTTLE_BACKOFF', default=1.0, cast=float)
+# Pooled connections idle for longer than this are reopened, not reused
+EMAIL_POOL_MAX_IDLE = config('EMAIL_POOL_MAX_IDLE', default=30.0, cast=float)
+
 # Application-specific settings
 SITE_NAME = config('SITE_NAME', default='ALX Travel App')
 SITE_URL = config('SITE_URL', default='http://localhost:8000')
@@ -217,6 +252,13 @@ SUPPORT_EMAIL = config('SUPPORT_EMAIL', default='support@alxtravel.com')
 BOOKING_CONFIRMATION_EMAIL_ENABLED = config('BOOKING_CONFIRMATION_EMAIL_ENABLED', default=True, cast=bool)
 BOOKING_REMINDER_HOURS_BEFORE = config('BOOKING_REMINDER_HOURS_BEFORE', default=24, cast=int)
 MAX_BOOKING_DAYS_AHEAD = config('MAX_BOOKING_DAYS_AHEAD', default=365, cast=int)
+BOOKING_BULK_ACTION_MAX = config('BOOKING_BULK_ACTION_MAX', default=500, cast=int)
+BOOKING_COMPLETION_BATCH_SIZE = config('BOOKING_COMPLETION_BATCH_SIZE', default=1000, cast=int)
+
+# Booking archival settings
+BOOKING_ARCHIVE_DATABASE = config('BOOKING_ARCHIVE_DATABASE', default='archive')
+BOOKING_ARCHIVE_AFTER_DAYS = config('BOOKING_ARCHIVE_AFTER_DAYS', default=180, cast=int)
+BOOKING_ARCHIVE_CHUNK_SIZE = config('BOOKING_ARCHIVE_CHUNK_SIZE', default=500, cast=int)
 
 # File upload settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
@@ -234,33 +276,47 @@ CSRF_COOKIE_SECURE = not DEBUG
 CSRF_COOKIE_HTTPONLY = True
 
 # Logging configuration
+LOG_FILE_MAX_BYTES = config('LOG_FILE_MAX_BYTES', default=10 * 1024 * 1024, cast=int)
+LOG_FILE_BACKUP_COUNT = config('LOG_FILE_BACKUP_COUNT', default=5, cast=int)
+# Files of exited processes are deleted after this many days without writes
+LOG_FILE_RETENTION_DAYS = config('LOG_FILE_RETENTION_DAYS', default=7, cast=int)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
-        'verbose': {
-            'format': '[{levelname}] {asctime} {name} {process:d} {thread:d} {message}',
-            'style': '{',
-        },
         'simple': {
             'format': '[{levelname}] {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'alx_travel_app.log_handlers.JSONFormatter',
+        },
     },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
             'formatter': 'simple',
         },
+        # Non-blocking: records are queued and written as JSON lines by a
+        # background thread, which opens the file on the first record.
+        # One file per process ({pid}), so each process can rotate its own;
+        # files of exited processes expire after LOG_FILE_RETENTION_DAYS.
         'file': {
-            'class': 'logging.FileHandler',
-            'filename': BASE_DIR / 'logs' / 'django.log',
-            'formatter': 'verbose',
+            'class': 'alx_travel_app.log_handlers.QueuedRotatingFileHandler',
+            'filename': BASE_DIR / 'logs' / 'django.{pid}.log',
+            'formatter': 'json',
+            'max_bytes': LOG_FILE_MAX_BYTES,
+            'backup_count': LOG_FILE_BACKUP_COUNT,
+            'retention': LOG_FILE_RETENTION_DAYS * 24 * 60 * 60,
         },
         'celery': {
-            'class': 'logging.FileHandler',
-            'filename': BASE_DIR / 'logs' / 'celery.log',
-            'formatter': 'verbose',
+            'class': 'alx_travel_app.log_handlers.QueuedRotatingFileHandler',
+            'filename': BASE_DIR / 'logs' / 'celery.{pid}.log',
+            'formatter': 'json',
+            'max_bytes': LOG_FILE_MAX_BYTES,
+            'backup_count': LOG_FILE_BACKUP_COUNT,
+            'retention': LOG_FILE_RETENTION_DAYS * 24 * 60 * 60,
         },
     },
     'loggers': {
@@ -310,6 +366,18 @@ CACHES = {
     }
 }
 
+# Listing cards are rebuilt on change, so they can live for a day
+LISTING_CARD_CACHE_TIMEOUT = config('LISTING_CARD_CACHE_TIMEOUT', default=24 * 60 * 60, cast=int)
+
+# Trending listings: ranked by bookings created in the last week
+TRENDING_WINDOW_HOURS = config('TRENDING_WINDOW_HOURS', default=7 * 24, cast=int)
+TRENDING_TOP_N = config('TRENDING_TOP_N', default=20, cast=int)
+# Hours recounted on every run, to catch bookings that commit late
+TRENDING_RECOUNT_HOURS = config('TRENDING_RECOUNT_HOURS', default=2, cast=int)
+# How often the whole window is recounted, to correct cancellations and deletions
+TRENDING_REBUILD_HOURS = config('TRENDING_REBUILD_HOURS', default=6, cast=int)
+TRENDING_LOCK_TIMEOUT = 5 * 60
+
 # Internationalization and localization
 USE_L10N = True
 DECIMAL_SEPARATOR = '.'
@@ -321,16 +389,27 @@ THOUSAND_SEPARATOR = ','
 # API versioning
 API_VERSION = 'v1'
 
+# Cold start budget in milliseconds, checked by `manage.py profile_startup --check`.
+# The defaults are the target, half of the cold start before the slim worker
+# profile (337 ms manage, 347 ms worker). They are not met yet, so --check
+# fails until they are.
+STARTUP_TIME_BUDGET_MS = {
+    'manage': config('STARTUP_BUDGET_MANAGE_MS', default=170, cast=int),
+    'worker': config('STARTUP_BUDGET_WORKER_MS', default=175, cast=int),
+}
+
 # Development settings
 if DEBUG:
+    # Optional development apps. find_spec() only looks the package up,
+    # so settings never pay for importing them.
+    if find_spec('django_extensions') is not None:
+        INSTALLED_APPS += ['django_extensions']
+    
     # Django Debug Toolbar (optional)
-    try:
-        import debug_toolbar
+    if find_spec('debug_toolbar') is not None:
         INSTALLED_APPS += ['debug_toolbar']
         MIDDLEWARE += ['debug_toolbar.middleware.DebugToolbarMiddleware']
         INTERNAL_IPS = ['127.0.0.1', 'localhost']
-    except ImportError:
-        pass
     
     # Disable cache in development
     CACHES['default']['BACKEND'] = 'django.core.cache.backends.dummy.DummyCache'
@@ -341,6 +420,10 @@ if 'test' in os.sys.argv:
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': ':memory:',
     }
+    DATABASES['archive'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
     
     # Use in-memory cache for testing
     CACHES['default']['BACKEND'] = 'django.core.cache.backends.locmem.LocMemCache'
@@ -0,0 +1,38 @@
+"""
+Slim settings profile for Celery workers.
+
+Loads only what task execution needs: models, the ORM, templates for
+emails and Celery configuration. It is the default for the celery program
+(see celery.py), so workers and beat use it unless DJANGO_SETTINGS_MODULE
+says otherwise:
+
+    celery -A alx_travel_app worker
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    
+    # Local apps
+    'listings',
+    'bookings',
+]
+
+MIDDLEWARE = []
+
+# Email templates are rendered without a request, so no context processors
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [BASE_DIR / 'templates'],
+        'APP_DIRS': False,
+    },
+]
+
+# Celery's Django fixup runs the full system check framework on worker boot,
+# which imports the URLconf, every view and DRF. Checks already run under
+# manage.py and in CI, so workers skip them.
+os.environ.setdefault('CELERY_SKIP_CHECKS', 'true')
@@ -0,0 +1,142 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from django.test import SimpleTestCase
+from .log_handlers import QueuedRotatingFileHandler, close_handlers
+
+
+class QueuedRotatingFileHandlerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.log_dir = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.logger = logging.getLogger(f'{__name__}.{self._testMethodName}')
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+
+    def tearDown(self):
+        for handler in self.logger.handlers:
+            handler.close()
+        self.logger.handlers = []
+
+    def make_handler(self, filename, **options):
+        handler = QueuedRotatingFileHandler(self.log_dir / filename, **options)
+        self.logger.handlers = [handler]
+        return handler
+
+    def read_lines(self, pattern='*'):
+        return [
+            json.loads(line)
+            for path in sorted(self.log_dir.glob(pattern))
+            for line in path.read_text().splitlines()
+        ]
+
+    def fork(self, target):
+        """
+        Run target in a forked child that exits with os._exit(), like a
+        billiard prefork child. Returns the child's pid.
+        """
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                target()
+                code = 0
+            finally:
+                os._exit(code)
+        return pid
+
+    def wait(self, pids):
+        for pid in pids:
+            _, status = os.waitpid(pid, 0)
+            self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+
+    def test_writes_json_lines_with_extra_fields(self):
+        handler = self.make_handler('app.log')
+
+        self.logger.info('Booking %s confirmed', 'abc', extra={'booking_id': 'abc'})
+        handler.close()
+
+        [line] = self.read_lines()
+        self.assertEqual(line['message'], 'Booking abc confirmed')
+        self.assertEqual(line['booking_id'], 'abc')
+        self.assertEqual(line['level'], 'INFO')
+
+    def test_forked_children_rotate_their_own_files(self):
+        # The parent never logs before forking, like a prefork or
+        # preloaded master
+        self.make_handler('celery.{pid}.log', max_bytes=20000, backup_count=1000)
+
+        def child():
+            for i in range(3000):
+                self.logger.info('line %d', i)
+            close_handlers()
+
+        pids = [self.fork(child) for _ in range(4)]
+        self.wait(pids)
+
+        lines = self.read_lines()
+        self.assertEqual(len(lines), 12000)
+        self.assertEqual({line['process'] for line in lines}, set(pids))
+        for pid in pids:
+            self.assertEqual(len(self.read_lines(f'celery.{pid}.log*')), 3000)
+        self.assertEqual(list(self.log_dir.glob(f'celery.{os.getpid()}.log*')), [])
+
+    def test_close_handlers_drains_queue_before_os_exit(self):
+        self.make_handler('celery.{pid}.log', flush_interval=10)
+
+        def child():
+            for i in range(100):
+                self.logger.info('line %d', i)
+            close_handlers()
+
+        self.wait([self.fork(child)])
+
+        self.assertEqual(len(self.read_lines()), 100)
+
+    def test_dropped_records_are_reported(self):
+        handler = self.make_handler('app.log', queue_size=10, flush_interval=0.5)
+
+        for i in range(100):
+            self.logger.info('line %d', i)
+        handler.close()
+
+        lines = self.read_lines()
+        [report] = [line for line in lines if 'dropped' in line]
+        self.assertEqual(report['level'], 'WARNING')
+        self.assertEqual(report['dropped'], handler.dropped)
+        self.assertEqual(len(lines) - 1 + handler.dropped, 100)
+
+    def test_removes_expired_files_of_exited_processes(self):
+        exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+        exited.wait()
+        old = time.time() - 3600
+
+        paths = {
+            name: self.log_dir / name
+            for name in (
+                f'celery.{exited.pid}.log',
+                f'celery.{exited.pid}.log.1',
+                f'celery.{os.getpid()}.log',
+                'other.log',
+            )
+        }
+        for path in paths.values():
+            path.write_text('{}\n')
+            os.utime(path, (old, old))
+        recent = self.log_dir / f'celery.{exited.pid + 1000000}.log'
+        recent.write_text('{}\n')
+
+        handler = self.make_handler('celery.{pid}.log', retention=60)
+        handler.remove_expired_files()
+
+        self.assertFalse(paths[f'celery.{exited.pid}.log'].exists())
+        self.assertFalse(paths[f'celery.{exited.pid}.log.1'].exists())
+        # Live process, unrelated file and a file written recently
+        self.assertTrue(paths[f'celery.{os.getpid()}.log'].exists())
+        self.assertTrue(paths['other.log'].exists())
+        self.assertTrue(recent.exists())